@@ -1,48 +1,50 @@
-from src import create_app
-from src.routes import routes
 from src.service import AOFService
 from src.nats_client import NATSClient
 import asyncio
-import threading
+import signal
+import uvloop
 from src.logger import logger
 
-# Create and configure the Flask app
-app = create_app()
-app.register_blueprint(routes)
-
-
-def run_flask_app():
-    """Run the Flask app in a separate thread."""
-    app.run(host="0.0.0.0", port=3003, debug=True, use_reloader=False) # Disable reloader to prevent multiple instances
-
 
 if __name__ == "__main__":
-    # Start Flask app in a separate thread
-    flask_thread = threading.Thread(target=run_flask_app)
-    flask_thread.daemon = True  # Ensure thread closes when the main program exits
-    flask_thread.start()
-
-        # Initialize and run the AOF Service
+    # Initialize and run the AOF Service; it also serves /status on its event loop
     # Create the NATSClient instance
     nats_client = NATSClient()
 
     # Pass NATSClient to AOFService
     aof_service = AOFService(nats_client=nats_client)
-    # Start the async service
-    loop = asyncio.get_event_loop()
+    # Start the async service on uvloop
+    uvloop.install()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    # Initialize the service (start the HTTP server, connect to Redis and NATS).
+    # start() can block for a long time (model load, NATS connect retries), so
+    # it runs as a task that a shutdown signal can cancel.
+    start_task = loop.create_task(aof_service.start())
+
+    def request_stop():
+        aof_service.stop()
+        start_task.cancel()  # No-op once start() has finished
+
+    # Stop on SIGINT/SIGTERM (docker stop sends SIGTERM), including during startup
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, request_stop)
     try:
         logger.info("Starting AOF Service...")
-        # Initialize the service (connect to Redis and NATS)
-        loop.run_until_complete(aof_service.start())
-        # Run the service continuously
+        loop.run_until_complete(start_task)
+        # Run the service until a shutdown signal is received
         loop.run_until_complete(aof_service.run())
-    except KeyboardInterrupt:
         logger.info("Received shutdown signal.")
-        # Gracefully shut down the service
-        loop.run_until_complete(aof_service.shutdown())
+    except asyncio.CancelledError:
+        logger.info("Received shutdown signal during startup.")
+    except Exception as e:
+        logger.error(f"AOF Service failed: {e}")
+        raise
     finally:
-        # Stop the Flask thread
-        flask_thread.join()
+        # Gracefully shut down whatever start() managed to bring up; each
+        # shutdown step is skipped if its resource was never created
+        loop.run_until_complete(aof_service.shutdown())
         loop.stop()
         loop.close()
         logger.info("AOF Service stopped.")
\ No newline at end of file
@@ -1,7 +1,9 @@
 # app/__init__.py
 
-from flask import Flask
+from aiohttp import web
+from src.routes import routes
 
 def create_app():
-    app = Flask(__name__)
+    app = web.Application()
+    app.add_routes(routes)
     return app
\ No newline at end of file
@@ -1,8 +1,11 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 from datetime import datetime
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
-import pytz
 
 # Load environment variables
 load_dotenv()
@@ -10,7 +13,9 @@ load_dotenv()
 # Logger Configuration
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 LOG_FILE = "./logs/aof-service.log"
-TIMEZONE = pytz.timezone("America/Chicago")
+LOG_FILE_MAX_BYTES = 10_000_000
+LOG_FILE_BACKUP_COUNT = 5
+TIMEZONE = ZoneInfo("America/Chicago")
 
 # Ensure the log directory exists
 LOG_DIR = "./logs"
@@ -18,9 +23,19 @@ if not os.path.exists(LOG_DIR):
     os.makedirs(LOG_DIR)
 
 class PlainTextFormatter(logging.Formatter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Timestamps only have second resolution, so reuse the last one
+        self._last_sec = None
+        self._last_str = None
+
     def formatTime(self, record, datefmt=None):
-        record_time = datetime.fromtimestamp(record.created, tz=TIMEZONE)
-        return record_time.strftime("%Y-%m-%d %H:%M:%S")
+        sec = int(record.created)
+        if sec != self._last_sec:
+            record_time = datetime.fromtimestamp(sec, tz=TIMEZONE)
+            self._last_str = record_time.strftime("%Y-%m-%d %H:%M:%S")
+            self._last_sec = sec
+        return self._last_str
 
     def format(self, record):
         time = self.formatTime(record)
@@ -37,13 +52,21 @@ logger.setLevel(LOG_LEVEL)
 console_handler = logging.StreamHandler()
 console_formatter = PlainTextFormatter()
 console_handler.setFormatter(console_formatter)
-logger.addHandler(console_handler)
 
 # File handler
-file_handler = logging.FileHandler(LOG_FILE)
+file_handler = logging.handlers.RotatingFileHandler(
+    LOG_FILE, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUP_COUNT
+)
 file_formatter = PlainTextFormatter()
 file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+
+# Records are queued on the calling thread and written by a background
+# listener, keeping console/file I/O off the event loop.
+log_queue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(log_queue))
+log_listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler)
+log_listener.start()
+atexit.register(log_listener.stop)
 
 # Log initialization message
 logger.info("Logger initialized successfully.")
\ No newline at end of file
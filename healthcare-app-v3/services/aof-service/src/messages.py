@@ -0,0 +1,20 @@
+import msgspec
+
+# Typed schemas for inbound NATS payloads. Decoding straight into these
+# structs skips building an intermediate dict for every message.
+
+class TranscriptionMsg(msgspec.Struct):
+    sessionId: str | None = None
+    transcript: str | None = None
+    timestamp: str | None = None
+
+
+class CommandMsg(msgspec.Struct):
+    sessionId: str | None = None
+    reason: str | None = None
+    patientDID: str | None = None
+    clinicianDID: str | None = None
+    clinicName: str | None = None
+    startTime: str | None = None
+    audioConfig: dict | None = None
+    transcriptPreferences: dict | None = None
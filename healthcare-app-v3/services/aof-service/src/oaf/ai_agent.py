@@ -1,40 +1,68 @@
 import json
 import os
+import threading
+
+# Pin the BLAS/OpenMP thread pools before torch is loaded. Concurrency comes
+# from the service's worker pool; one intra-op thread per call avoids
+# oversubscribing the host when several sessions are classified at once.
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", "1"))
+os.environ.setdefault("OMP_NUM_THREADS", str(TORCH_NUM_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(TORCH_NUM_THREADS))
+
+import torch
+torch.set_num_threads(TORCH_NUM_THREADS)
+torch.set_num_interop_threads(1)
+
 from src.oaf.embedding_classifier import EmbeddingClassifierFromFile
 from src.oaf.chunking import chunk_text_per_sentence
 from src.oaf.visualizer import generate_html_visualization
 from src.logger import logger
 
+_classifier = None
+_classifier_lock = threading.Lock()
+
+def _get_classifier():
+    """
+    Return the shared classifier, loading the model and classifier
+    embeddings on first use only.
+    """
+    global _classifier
+    if _classifier is not None:
+        return _classifier
+
+    with _classifier_lock:
+        if _classifier is None:
+            # Construct the path dynamically
+            classifiers_file = os.path.join(os.path.dirname(__file__), 'data', 'sample_classifiers.json')
+
+            # Check if the file exists
+            if not os.path.exists(classifiers_file):
+                logger.error(f"Classifier file not found at {classifiers_file}.")
+                raise FileNotFoundError(f"Classifier file not found at {classifiers_file}.")
+
+            # Use the dynamically constructed path
+            _classifier = EmbeddingClassifierFromFile(
+                model_name='sentence-transformers/all-MiniLM-L6-v2',
+                classifiers_file=classifiers_file  # Pass the correct path
+            )
+            logger.info("Embedding classifier loaded.")
+    return _classifier
+
 def analyze_transcript(transcript, session_id, timestamp):
     """
     Analyze a single transcript and return results as an array of dictionaries.
     Each dictionary contains session information and analysis results.
     """
-    
-    # Construct the path dynamically
-    classifiers_file = os.path.join(os.path.dirname(__file__), 'data', 'sample_classifiers.json')
-
-    # Check if the file exists
-    if not os.path.exists(classifiers_file):
-        logger.error(f"Classifier file not found at {classifiers_file}.")
-        raise FileNotFoundError(f"Classifier file not found at {classifiers_file}.")
-
-    # Use the dynamically constructed path
-    classifier = EmbeddingClassifierFromFile(
-        model_name='sentence-transformers/all-MiniLM-L6-v2',
-        classifiers_file=classifiers_file  # Pass the correct path
-    )
+    classifier = _get_classifier()
     # Chunk the transcript by sentence
     chunks = chunk_text_per_sentence(transcript)
-    chunk_scores = []
-
-    # Analyze each chunk
-    for chunk in chunks:
-        chunk_result = classifier.classify(chunk)
-        chunk_scores.append({
-            'chunk': chunk,
-            'scores': chunk_result
-        })
+
+    # Analyze all chunks in a single batch
+    chunk_results = classifier.classify_batch(chunks)
+    chunk_scores = [
+        {'chunk': chunk, 'scores': chunk_result}
+        for chunk, chunk_result in zip(chunks, chunk_results)
+    ]
 
     # Return the results array
     results = [{
@@ -1,5 +1,8 @@
 import re
 
+# Compiled once at import; sentence splitting runs on every transcription message
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
 def chunk_text_per_sentence(text):
-    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-    return [s for s in sentences if s]
\ No newline at end of file
+    sentences = _SENTENCE_SPLIT.split(text.strip())
+    return [s for s in sentences if s]
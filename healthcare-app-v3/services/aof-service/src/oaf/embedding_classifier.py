@@ -1,23 +1,72 @@
 import json
+import os
+import numpy as np
+import torch
 from src.logger import logger
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
+
+# Directory holding the int8-quantized ONNX export of the model (see Dockerfile)
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "/opt/models/minilm-onnx")
+
+# Transcript sentences are short; truncating well below MiniLM's 256 avoids wasted FLOPs
+MAX_SEQ_LENGTH = 128
 
 class EmbeddingClassifierFromFile:
     def __init__(self, model_name: str, classifiers_file: str):
-        self.model = SentenceTransformer(model_name)
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        if self.device == "cpu" and os.path.isdir(ONNX_MODEL_DIR):
+            # CPU-only deployments use the int8-quantized ONNX model instead
+            from src.oaf.onnx_encoder import OnnxSentenceEncoder
+            self.model = OnnxSentenceEncoder(ONNX_MODEL_DIR, max_seq_length=MAX_SEQ_LENGTH)
+        else:
+            self.model = SentenceTransformer(model_name, device=self.device)
+            self.model.max_seq_length = MAX_SEQ_LENGTH
+        if not self.model.tokenizer.is_fast:
+            logger.warning("Fast (Rust) tokenizer unavailable; install `tokenizers` for faster encoding.")
+        # Embeddings only stay as torch tensors on GPU; on CPU the similarity
+        # matmul is done directly in NumPy.
+        self.use_tensors = self.device == "cuda"
+        if self.device == "cuda":
+            # Half precision on GPU; bf16 where the hardware supports it (Ampere+)
+            if torch.cuda.is_bf16_supported():
+                self.model.to(torch.bfloat16)
+            else:
+                self.model.half()
+        logger.info(f"Embedding model {model_name} loaded on {self.device}.")
         with open(classifiers_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
 
-        self.classifiers = []
-        for item in data:
-            emb = self.model.encode(item['text'], convert_to_tensor=True)
-            self.classifiers.append({'label': item['label'], 'embedding': emb})
+        # Encode every classifier text in one batch and keep them stacked as a
+        # single pre-normalized (N, D) matrix so classify() is one matmul.
+        self.labels = [item['label'] for item in data]
+        texts = [item['text'] for item in data]
+        self.class_emb = self.model.encode(
+            texts, convert_to_tensor=self.use_tensors, normalize_embeddings=True, batch_size=64
+        )
+        if not self.use_tensors:
+            # Both encoders already return contiguous float32; this only guarantees
+            # the similarity matmul stays a single BLAS sgemm (no copy when it is)
+            self.class_emb = np.ascontiguousarray(self.class_emb, dtype=np.float32)
 
     def classify(self, text):
-        text_emb = self.model.encode(text, convert_to_tensor=True)
-        scores = []
-        for c in self.classifiers:
-            sim = util.cos_sim(text_emb, c['embedding']).item()
-            scores.append({'label': c['label'], 'score': sim})
-        scores.sort(key=lambda x: x['score'], reverse=True)
-        return scores
\ No newline at end of file
+        text_emb = self.model.encode(text, convert_to_tensor=self.use_tensors, normalize_embeddings=True)
+        scores = self._to_numpy(self.class_emb @ text_emb)
+        return self._rank(scores)
+
+    def classify_batch(self, texts: list[str]):
+        """Classify several texts with a single encoder pass; returns one ranking per text."""
+        if not texts:
+            return []
+        emb = self.model.encode(
+            texts, convert_to_tensor=self.use_tensors, normalize_embeddings=True, batch_size=32
+        )
+        sims = self._to_numpy(emb @ self.class_emb.T)
+        return [self._rank(row) for row in sims]
+
+    def _to_numpy(self, scores):
+        # NumPy has no bfloat16, so GPU scores are upcast before leaving the device
+        return scores.float().cpu().numpy() if self.use_tensors else scores
+
+    def _rank(self, scores):
+        order = np.argsort(-scores)
+        return [{'label': self.labels[i], 'score': float(scores[i])} for i in order]
@@ -0,0 +1,53 @@
+import onnxruntime
+import torch
+from transformers import AutoTokenizer
+from optimum.onnxruntime import ORTModelForFeatureExtraction
+from src.logger import logger
+
+class OnnxSentenceEncoder:
+    """
+    Drop-in replacement for SentenceTransformer.encode() backed by an
+    int8-quantized ONNX export of the model, for CPU-only deployments.
+    """
+
+    def __init__(self, model_dir: str, file_name: str = "model_int8.onnx", max_seq_length: int = 256):
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        # Match the torch thread pinning so ONNX Runtime doesn't spawn a pool per core
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = torch.get_num_threads()
+        session_options.inter_op_num_threads = 1
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir, file_name=file_name, provider="CPUExecutionProvider",
+            session_options=session_options
+        )
+        self.max_seq_length = max_seq_length
+        # AutoTokenizer loads the Rust-backed fast tokenizer when available
+        logger.info(f"Loaded ONNX encoder {file_name} from {model_dir}.")
+
+    def encode(self, sentences, batch_size=32, convert_to_tensor=False, normalize_embeddings=False):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            inputs = self.tokenizer(
+                sentences[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="pt",
+            )
+            with torch.no_grad():
+                token_emb = self.model(**inputs).last_hidden_state
+            # Mean pooling over real (non-padding) tokens
+            mask = inputs["attention_mask"].unsqueeze(-1).to(token_emb.dtype)
+            emb = (token_emb * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            if normalize_embeddings:
+                emb = torch.nn.functional.normalize(emb, p=2, dim=1)
+            batches.append(emb)
+
+        embeddings = torch.cat(batches) if batches else torch.empty(0)
+        if single:
+            embeddings = embeddings[0]
+        return embeddings if convert_to_tensor else embeddings.numpy()
@@ -1,17 +1,29 @@
 # app/routes.py
 
-from flask import Blueprint, jsonify
+from aiohttp import web
 import psutil
 from time import time
 
-routes = Blueprint('routes', __name__)
+routes = web.RouteTableDef()
 
-@routes.route('/status', methods=['GET'])
-def status():
+# Status payload is reused for this many seconds so frequent scrapers don't
+# hit /proc on every request
+STATUS_CACHE_TTL = 1.0
+_cache = {"t": 0.0, "val": None}
+
+@routes.get('/status')
+async def status(request):
+    now = time()
+    if _cache["val"] is None or now - _cache["t"] >= STATUS_CACHE_TTL:
+        _cache["val"] = _build_status(now)
+        _cache["t"] = now
+    return web.json_response(_cache["val"], status=200)
+
+def _build_status(now):
     memory_usage = psutil.virtual_memory()
-    uptime = time() - psutil.boot_time()
+    uptime = now - psutil.boot_time()
 
-    return jsonify({
+    return {
         "service": {
             "name": "aof-service",
             "version": "1.0.0",
@@ -28,4 +40,4 @@ def status():
                 "heapUsed": memory_usage.used
             }
         }
-    }), 200
\ No newline at end of file
+    }
\ No newline at end of file
@@ -1,17 +1,24 @@
 import asyncio
-import json
+import contextlib
+import msgspec
+import orjson
 import os
-import aioredis  # Redis client
+import time
+from collections import deque
+from redis.asyncio import Redis, ConnectionPool  # Redis client
+from aiohttp import web
 from dotenv import load_dotenv
+from src import create_app
 from src.nats_client import NATSClient
 from src.logger import logger
+from src.messages import TranscriptionMsg, CommandMsg
 from datetime import datetime
-from src.oaf.ai_agent import analyze_transcript, generate_visualization
+from src.oaf.ai_agent import analyze_transcript, generate_visualization, _get_classifier
 
 async def process_transcription(self, msg):
     """Process transcription message."""
     try:
-        data = json.loads(msg.data.decode())
+        data = orjson.loads(msg.data)
         session_id = data.get("sessionId")
         transcript = data.get("transcript")
         timestamp = data.get("timestamp", datetime.now().isoformat())
@@ -31,12 +38,52 @@ async def process_transcription(self, msg):
 # Load the environment variables
 load_dotenv()
 
+# Words are buffered per session and only analyzed at a sentence boundary
+# or once this many words have accumulated.
+FLUSH_WORD_THRESHOLD = int(os.getenv("AOF_FLUSH_WORD_THRESHOLD", "20"))
+SENTENCE_ENDINGS = (".", "!", "?")
+
+# Port for the HTTP status endpoint
+HTTP_PORT = 3003
+
+# Maximum number of transcription flushes processed concurrently
+WORKER_CONCURRENCY = int(os.getenv("AOF_WORKER_CONCURRENCY", "32"))
+
+# Sessions with no transcription activity for this many seconds have their
+# remaining words flushed and their buffer released
+SESSION_IDLE_TIMEOUT = float(os.getenv("AOF_SESSION_IDLE_TIMEOUT", "300"))
+
+# Session state fields stored as Redis lists next to the session hash
+SESSION_LIST_FIELDS = ("transcriptions", "control")
+
+
+class SessionBuffer:
+    """Transcript fragments buffered for one session and the lock that keeps them in order."""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.fragments = deque()
+        # Words across all buffered fragments (each message can carry several)
+        self.word_count = 0
+        # Tasks holding or waiting on the lock; the buffer is only dropped at 0
+        self.users = 0
+        self.last_seen = time.monotonic()
+
 
 class AOFService:
     def __init__(self, nats_client):
         self.nats_client = nats_client
         self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
         self.redis_client = None
+        self.http_runner = None
+        # One buffer (and lock) per session keeps its words in order while
+        # sessions run in parallel
+        self._sessions = {}
+        self._sem = asyncio.Semaphore(WORKER_CONCURRENCY)
+        self._tasks = set()
+        self._stop = asyncio.Event()
+        self._subscriptions = []
+        self._eviction_task = None
 
     def getUniqueSessionId(self, session_id):
         return f"{session_id}:aof-service"  
@@ -44,116 +91,163 @@ class AOFService:
     async def start(self):
         """Start the AOF Service."""
         logger.info("Starting AOF Service...")
+        # Serve /status first so liveness probes answer while the model loads
+        # and NATS connects
+        await self.start_http_server()
         logger.info(f"Connecting to Redis at {self.redis_url}...")
-        self.redis_client = await aioredis.from_url(self.redis_url)
+        pool = ConnectionPool.from_url(
+            self.redis_url,
+            max_connections=int(os.getenv("REDIS_POOL_SIZE", "50")),
+            decode_responses=False,
+        )
+        self.redis_client = Redis.from_pool(pool)
+        # Load the classifier up front so the first message doesn't pay the cold start
+        logger.info("Loading embedding classifier...")
+        await asyncio.get_running_loop().run_in_executor(None, _get_classifier)
         await self.nats_client.connect()
         await self.subscribe_to_events()
+        self._eviction_task = asyncio.create_task(self.evict_idle_sessions())
         logger.info("AOF Service started.")
 
+    async def start_http_server(self):
+        """Serve the HTTP routes (e.g. /status) on the service's own event loop."""
+        self.http_runner = web.AppRunner(create_app())
+        await self.http_runner.setup()
+        await web.TCPSite(self.http_runner, "0.0.0.0", HTTP_PORT).start()
+        logger.info(f"HTTP server listening on port {HTTP_PORT}.")
+
     async def run(self):
         """
-        Continuously runs the AOF Service to process NATS messages.
-        Keeps the NATS client active and listens for events.
+        Runs the AOF Service until a stop is requested.
+        NATS callbacks do the work; this just keeps the service alive.
         """
-        while True:
-            try:
-                logger.info("Starting AOF Service main loop...")
-                await asyncio.Future()  # Keeps the loop running indefinitely
-            except asyncio.CancelledError:
-                # Graceful shutdown in case of cancellation
-                logger.info("AOF Service main loop cancelled.")
-                break
-            except Exception as e:
-                logger.error(f"Error in AOF Service main loop: {e}")
-                await asyncio.sleep(5)  # Avoid tight retry loops
-            
+        logger.info("Starting AOF Service main loop...")
+        await self._stop.wait()
+        logger.info("AOF Service main loop stopped.")
+
+    def stop(self):
+        """Request the main loop to stop (safe to call from a signal handler)."""
+        self._stop.set()
+
     async def shutdown(self):
-        """Shut down the service."""
+        """
+        Shut down the service: stop taking NATS messages, finish in-flight
+        work, then close the connections it depends on.
+        """
         logger.info("Shutting down AOF Service...")
-        if self.redis_client:
-            await self.redis_client.close()
-            logger.info("Redis client closed.")
+        self._stop.set()
+        if self._eviction_task:
+            # The evictor exits on the stop event; awaiting it (rather than
+            # cancelling) lets a flush it already started finish, since its
+            # words have been taken out of the buffer.
+            await self._eviction_task
+
+        # Drain the subscriptions so remaining messages are delivered but no
+        # new ones arrive; the connection stays open for publishing results.
+        for sub in self._subscriptions:
+            try:
+                await sub.drain()
+            except Exception as e:
+                logger.error(f"Error draining subscription {sub.subject}: {e}")
+
+        if self._tasks:
+            logger.info(f"Waiting for {len(self._tasks)} in-flight transcription tasks...")
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        # Persist words still buffered for sessions that never sent a stop
+        for session_id in list(self._sessions):
+            try:
+                await self.flush_pending_transcription(session_id)
+            except Exception as e:
+                logger.error(f"Error flushing session {session_id} during shutdown: {e}")
+
         try:
             await self.nats_client.nc.drain()
             logger.info("NATS client drained successfully.")
         except Exception as e:
             logger.error(f"Error during NATS client drain: {e}")
+        if self.http_runner:
+            await self.http_runner.cleanup()
+            logger.info("HTTP server stopped.")
+        if self.redis_client:
+            await self.redis_client.aclose()
+            logger.info("Redis client closed.")
         logger.info("AOF Service shut down.")
 
     async def save_session_state(self, session_id, state):
-        """Save session state to Redis."""
+        """
+        Save session state to Redis.
+
+        Scalar fields are written to the session hash; list fields
+        ("transcriptions", "control") are appended to their own Redis lists,
+        so callers only pass what changed. Everything goes out in one pipeline.
+        """
         try:
             # get the unique session id
             unique_session_id = self.getUniqueSessionId(session_id)
-            timestamp = datetime.now().isoformat()
-            await self.redis_client.set(unique_session_id, json.dumps(state))
+            fields = {k: v for k, v in state.items() if k not in SESSION_LIST_FIELDS}
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                if fields:
+                    pipe.hset(unique_session_id, mapping={k: orjson.dumps(v) for k, v in fields.items()})
+                if state.get("transcriptions"):
+                    pipe.rpush(f"{unique_session_id}:transcriptions", *state["transcriptions"])
+                if state.get("control"):
+                    pipe.rpush(f"{unique_session_id}:control", *(orjson.dumps(c) for c in state["control"]))
+                await pipe.execute()
             logger.info(f"State saved for session {session_id}.")
         except Exception as e:
             logger.error(f"Error saving state for session {unique_session_id}: {e}")
 
-    async def retrieve_session_state(self, session_id):
-        """Retrieve session state from Redis."""
-        try:
-            # get the unique session id
-            unique_session_id = self.getUniqueSessionId(session_id)
-            state = await self.redis_client.get(unique_session_id)
-            return json.loads(state) if state else {}
-        except Exception as e:
-            logger.error(f"Error retrieving state for session {unique_session_id}: {e}")
-            return {}
-
-            
     async def process_command(self, msg, command_type):
         """Process commands for session control."""
         try:
-            data = json.loads(msg.data.decode())
-            session_id = data.get("sessionId")
+            data = msgspec.json.decode(msg.data, type=CommandMsg)
+            session_id = data.sessionId
             timestamp = datetime.now().isoformat()
             # get the unique session id
             unique_session_id = self.getUniqueSessionId(session_id)
             logger.info(f"Processing {command_type} command for this session: {unique_session_id}.")
 
-            if not unique_session_id:
+            if not session_id:
                 logger.error(f"Received {command_type} command without sessionId. Discarding.")
                 return
 
-            # Retrieve the state from Redis using the unique session ID
-            session_state = await self.retrieve_session_state(unique_session_id)
+            if command_type == "stop":
+                # Persist buffered words before the session is closed
+                await self.flush_pending_transcription(session_id)
+
+            # Only the fields touched by this command are written
+            session_update = {}
 
             if command_type == "start":
                 logger.info(f"Starting session session-microservice index {unique_session_id}.")
 
                 # Save session initiation data from the start command
-                session_initiation = {
+                session_update.update({
                     "sessionId": session_id,
-                    "patientDID": data.get("patientDID"),
-                    "clinicianDID": data.get("clinicianDID"),
-                    "clinicName": data.get("clinicName"),
-                    "startTime": data.get("startTime", timestamp),
-                    "audioConfig": data.get("audioConfig", {}),
-                    "transcriptPreferences": data.get("transcriptPreferences", {})
-                }
-
-                # Update the session state with initiation data
-                session_state.update(session_initiation)
+                    "patientDID": data.patientDID,
+                    "clinicianDID": data.clinicianDID,
+                    "clinicName": data.clinicName,
+                    "startTime": data.startTime or timestamp,
+                    "audioConfig": data.audioConfig or {},
+                    "transcriptPreferences": data.transcriptPreferences or {}
+                })
 
             # Add command to session control
             session_control = {
                 "sessionId": session_id,
                 "action": command_type,
                 "timestamp": timestamp,
-                "reason": data.get("reason"),
+                "reason": data.reason,
             }
-
-            session_state["control"] = session_state.get("control", [])
-            session_state["control"].append(session_control)
+            session_update["control"] = [session_control]
 
             if command_type == "stop":
                 logger.info(f"Stopping session {unique_session_id}.")
-                session_state["endTime"] = timestamp
+                session_update["endTime"] = timestamp
 
             # Save updated session state
-            await self.save_session_state(unique_session_id, session_state)
+            await self.save_session_state(session_id, session_update)
             logger.info(f"Processed {command_type} command for session {unique_session_id}.")
         except Exception as e:
             logger.error(f"Error processing {command_type} command: {e}") 
@@ -175,39 +269,117 @@ class AOFService:
         await self.process_command(msg, "resume")    
     
     async def process_transcription(self, msg):
-        """Process transcription message."""
+        """
+        NATS callback for transcribed words. Hands the message to the worker
+        pool so a slow flush doesn't hold up the next message.
+        """
+        task = asyncio.create_task(self.handle_transcription(msg))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def handle_transcription(self, msg):
+        """
+        Buffer a transcribed word and flush the session's buffer for analysis
+        once it reaches a sentence boundary or the word threshold.
+        """
         try:
-            data = json.loads(msg.data.decode())
-            session_id = data.get("sessionId")
-            transcript = data.get("transcript")
-            unique_session_id = self.getUniqueSessionId(session_id)
-            timestamp = data.get("timestamp", datetime.now().isoformat())
+            data = msgspec.json.decode(msg.data, type=TranscriptionMsg)
+            session_id = data.sessionId
+            transcript = data.transcript
+            timestamp = data.timestamp or datetime.now().isoformat()
             if not session_id:
                 logger.error("Received message without sessionId. Discarding.")
                 return
+            if not transcript:
+                return
 
-            logger.info(f"Processing transcription for session {unique_session_id}: {transcript}")
-            # Retrieve state from Redis
-            session_state = await self.retrieve_session_state(unique_session_id)
-
-            # Perform processing (e.g., appending transcript to session state)
-            session_state["transcriptions"] = session_state.get("transcriptions", [])
-            session_state["transcriptions"].append(transcript)
-
-            # Analyze the transcript
-            analysis_results = analyze_transcript(transcript, session_id, timestamp)
-            logger.info(f"Analysis results: {analysis_results}")
-            
-            # Save updated state back to Redis
-            await self.save_session_state(unique_session_id, session_state)
-            
-            # Process the transcript to find highlighted words
-            await self.publish_highlighted_word(session_id, analysis_results)
-
-            logger.info(f"Processed transcription for session {unique_session_id}: {transcript}")
+            async with self.session_buffer(session_id) as buffer:
+                buffer.fragments.append(transcript)
+                buffer.word_count += len(transcript.split())
+                if not transcript.rstrip().endswith(SENTENCE_ENDINGS) and buffer.word_count < FLUSH_WORD_THRESHOLD:
+                    return
+                text = " ".join(buffer.fragments)
+                buffer.fragments.clear()
+                buffer.word_count = 0
+
+                async with self._sem:
+                    await self.flush_transcription(session_id, text, timestamp)
         except Exception as e:
             logger.error(f"Error processing transcription message: {e}")
-    
+
+    @contextlib.asynccontextmanager
+    async def session_buffer(self, session_id):
+        """Hold a session's lock and yield its buffer, creating it if needed."""
+        buffer = self._sessions.get(session_id)
+        if buffer is None:
+            buffer = self._sessions[session_id] = SessionBuffer()
+        # Counted before waiting so the buffer (and its lock) is never dropped
+        # while another task is queued on it
+        buffer.users += 1
+        try:
+            async with buffer.lock:
+                buffer.last_seen = time.monotonic()
+                yield buffer
+        finally:
+            buffer.users -= 1
+
+    async def flush_pending_transcription(self, session_id):
+        """
+        Flush whatever is left in a session's word buffer (e.g. on stop) and
+        release the buffer if no other task is using it.
+        """
+        if session_id not in self._sessions:
+            return
+        async with self.session_buffer(session_id) as buffer:
+            words = list(buffer.fragments)
+            buffer.fragments.clear()
+            buffer.word_count = 0
+            if words:
+                async with self._sem:
+                    await self.flush_transcription(session_id, " ".join(words), datetime.now().isoformat())
+
+        buffer = self._sessions.get(session_id)
+        if buffer is not None and buffer.users == 0 and not buffer.fragments:
+            del self._sessions[session_id]
+
+    async def evict_idle_sessions(self):
+        """Periodically flush and release sessions that stopped sending words without a stop command."""
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), SESSION_IDLE_TIMEOUT / 2)
+            except asyncio.TimeoutError:
+                pass
+            cutoff = time.monotonic() - SESSION_IDLE_TIMEOUT
+            for session_id, buffer in list(self._sessions.items()):
+                if self._stop.is_set():
+                    # Shutdown flushes whatever is left
+                    return
+                if buffer.users == 0 and buffer.last_seen < cutoff:
+                    logger.info(f"Session {session_id} idle for {SESSION_IDLE_TIMEOUT:.0f}s; releasing its buffer.")
+                    try:
+                        await self.flush_pending_transcription(session_id)
+                    except Exception as e:
+                        logger.error(f"Error flushing idle session {session_id}: {e}")
+
+    async def flush_transcription(self, session_id, transcript, timestamp):
+        """Analyze a buffered transcript fragment, persist it and publish the results."""
+        unique_session_id = self.getUniqueSessionId(session_id)
+        logger.info(f"Processing transcription for session {unique_session_id}: {transcript}")
+
+        # Analyze the transcript off the event loop so other sessions keep flowing
+        analysis_results = await asyncio.get_running_loop().run_in_executor(
+            None, analyze_transcript, transcript, session_id, timestamp
+        )
+        logger.info(f"Analysis results: {analysis_results}")
+
+        # Append the fragment to the session's transcription list
+        await self.save_session_state(session_id, {"transcriptions": [transcript]})
+
+        # Process the transcript to find highlighted words
+        await self.publish_highlighted_word(session_id, analysis_results)
+
+        logger.info(f"Processed transcription for session {unique_session_id}: {transcript}")
+
     async def publish_highlighted_word(self, session_id, highlighted_word):
         """
         Publish a message to the 'aof.word.highlighted' topic.
@@ -225,7 +397,7 @@ class AOFService:
 
         try:
             logger.info(f"Publishing to {subject}: {message}")
-            await self.nats_client.nc.publish(subject, json.dumps(message).encode())
+            await self.nats_client.nc.publish(subject, orjson.dumps(message))
             await self.nats_client.nc.flush()  # Ensure message delivery
             logger.info(f"Message published to {subject}: {message}")
         except Exception as e:
@@ -238,39 +410,43 @@ class AOFService:
         logger.info("Subscribing to transcription and command events...")
 
         # Subscribe to transcription events
-        await self.nats_client.nc.subscribe(
+        sub = await self.nats_client.nc.subscribe(
             "transcription.word.transcribed",
             "aof-transcription-queue",
             cb=self.process_transcription
         )
+        self._subscriptions.append(sub)
         logger.info("Subscribed to transcription.word.transcribed.")
 
         # Subscribe to specific command events
-        await self.nats_client.nc.subscribe(
+        sub = await self.nats_client.nc.subscribe(
             "command.transcribe.start",
             "aof-command-start-queue",
             cb=self.process_command_start
         )
+        self._subscriptions.append(sub)
         logger.info("Subscribed to command.transcribe.start with queue group aof-command-start-queue.")
 
-        await self.nats_client.nc.subscribe(
+        sub = await self.nats_client.nc.subscribe(
             "command.transcribe.stop",
-        "aof-command-stop-queue",
-        cb=self.process_command_stop
-    )
+            "aof-command-stop-queue",
+            cb=self.process_command_stop
+        )
+        self._subscriptions.append(sub)
         logger.info("Subscribed to command.transcribe.stop with queue group aof-command-stop-queue.")
 
-        await self.nats_client.nc.subscribe(
+        sub = await self.nats_client.nc.subscribe(
             "command.transcribe.pause",
             "aof-command-pause-queue",
             cb=self.process_command_pause
         )
+        self._subscriptions.append(sub)
         logger.info("Subscribed to command.transcribe.pause with queue group aof-command-pause-queue.")
 
-        await self.nats_client.nc.subscribe(
+        sub = await self.nats_client.nc.subscribe(
             "command.transcribe.resume",
-        "aof-command-resume-queue",
-        cb=self.process_command_resume
+            "aof-command-resume-queue",
+            cb=self.process_command_resume
         )
+        self._subscriptions.append(sub)
         logger.info("Subscribed to command.transcribe.resume with queue group aof-command-resume-queue.")
-        
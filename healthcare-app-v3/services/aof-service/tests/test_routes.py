@@ -0,0 +1,52 @@
+import importlib
+import unittest
+from unittest import mock
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from src import create_app
+
+# src/__init__.py rebinds src.routes to the RouteTableDef, so fetch the module itself
+routes_module = importlib.import_module("src.routes")
+
+
+class StatusRouteTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        routes_module._cache.update(t=0.0, val=None)
+        self.client = TestClient(TestServer(create_app()))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    async def test_status_reports_service_and_system(self):
+        resp = await self.client.get("/status")
+        self.assertEqual(resp.status, 200)
+        body = await resp.json()
+        self.assertEqual(set(body), {"service", "system"})
+        self.assertEqual(set(body["service"]), {"name", "version", "status", "uptime"})
+        self.assertEqual(body["service"]["status"], "UP")
+        self.assertEqual(
+            set(body["system"]),
+            {"loadAverage", "totalMemory", "freeMemory", "memoryUsage"},
+        )
+
+    async def test_status_payload_is_rebuilt_only_after_ttl(self):
+        build = mock.Mock(wraps=routes_module._build_status)
+        with mock.patch.object(routes_module, "_build_status", build), \
+                mock.patch.object(routes_module, "time") as clock:
+            clock.return_value = 1000.0
+            first = await (await self.client.get("/status")).json()
+            clock.return_value = 1000.0 + routes_module.STATUS_CACHE_TTL / 2
+            second = await (await self.client.get("/status")).json()
+            self.assertEqual(build.call_count, 1)
+            self.assertEqual(first, second)
+
+            clock.return_value = 1000.0 + routes_module.STATUS_CACHE_TTL
+            resp = await self.client.get("/status")
+            self.assertEqual(resp.status, 200)
+            self.assertEqual(build.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import asyncio
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import orjson
+
+from src import service as service_module
+from src.service import AOFService
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def hset(self, key, mapping):
+        self.commands.append(("hset", key, mapping))
+
+    def rpush(self, key, *values):
+        self.commands.append(("rpush", key, values))
+
+    async def execute(self):
+        for command, key, payload in self.commands:
+            if command == "hset":
+                self.redis.hashes.setdefault(key, {}).update(payload)
+            else:
+                self.redis.lists.setdefault(key, []).extend(payload)
+        self.redis.events.append("redis-write")
+
+
+class FakeRedis:
+    def __init__(self, events):
+        self.events = events
+        self.hashes = {}
+        self.lists = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def aclose(self):
+        self.events.append("redis-closed")
+
+
+class FakeNATS:
+    def __init__(self, events):
+        self.events = events
+        self.published = []
+
+    async def publish(self, subject, payload):
+        self.published.append((subject, orjson.loads(payload)))
+        self.events.append("nats-publish")
+
+    async def flush(self):
+        pass
+
+    async def drain(self):
+        self.events.append("nats-drained")
+
+
+def message(**data):
+    return SimpleNamespace(data=orjson.dumps(data))
+
+
+def fake_analyze(transcript, session_id, timestamp):
+    return [{"sessionId": session_id, "timestamp": timestamp, "analysis": transcript}]
+
+
+class AOFServiceBufferingTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.events = []
+        self.nc = FakeNATS(self.events)
+        self.service = AOFService(nats_client=SimpleNamespace(nc=self.nc))
+        self.service.redis_client = FakeRedis(self.events)
+        patcher = mock.patch.object(service_module, "analyze_transcript", side_effect=fake_analyze)
+        self.analyze = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def send(self, session_id, transcript):
+        await self.service.process_transcription(message(sessionId=session_id, transcript=transcript))
+
+    async def settle(self):
+        await asyncio.gather(*self.service._tasks)
+
+    def transcriptions(self, session_id):
+        key = f"{self.service.getUniqueSessionId(session_id)}:transcriptions"
+        return [t.decode() if isinstance(t, bytes) else t for t in self.service.redis_client.lists.get(key, [])]
+
+    async def test_flushes_at_sentence_boundary(self):
+        await self.send("s1", "hello")
+        await self.send("s1", "there")
+        await self.settle()
+        self.assertEqual(self.transcriptions("s1"), [])
+        self.analyze.assert_not_called()
+
+        await self.send("s1", "doctor.")
+        await self.settle()
+        self.assertEqual(self.transcriptions("s1"), ["hello there doctor."])
+        self.assertEqual(len(self.nc.published), 1)
+        self.assertEqual(self.nc.published[0][1]["highlightedWord"][0]["analysis"], "hello there doctor.")
+
+    async def test_flushes_when_word_threshold_is_reached(self):
+        with mock.patch.object(service_module, "FLUSH_WORD_THRESHOLD", 5):
+            await self.send("s1", "one two")
+            await self.send("s1", "three four")
+            await self.settle()
+            # Four words over two messages: still buffered
+            self.assertEqual(self.transcriptions("s1"), [])
+
+            await self.send("s1", "five six")
+            await self.settle()
+        self.assertEqual(self.transcriptions("s1"), ["one two three four five six"])
+
+    async def test_sessions_stay_ordered_while_running_in_parallel(self):
+        active = 0
+        max_active = 0
+        lock = threading.Lock()
+
+        def slow_analyze(transcript, session_id, timestamp):
+            nonlocal active, max_active
+            with lock:
+                active += 1
+                max_active = max(max_active, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+            return fake_analyze(transcript, session_id, timestamp)
+
+        self.analyze.side_effect = slow_analyze
+        sentences = [f"sentence {i}." for i in range(5)]
+        for sentence in sentences:
+            await self.send("s1", sentence)
+            await self.send("s2", sentence)
+        await self.settle()
+
+        self.assertEqual(self.transcriptions("s1"), sentences)
+        self.assertEqual(self.transcriptions("s2"), sentences)
+        self.assertGreaterEqual(max_active, 2)
+
+    async def test_stop_command_flushes_remaining_words_and_releases_buffer(self):
+        await self.send("s1", "pending words")
+        await self.settle()
+        self.assertIn("s1", self.service._sessions)
+
+        await self.service.process_command_stop(message(sessionId="s1", reason="done"))
+
+        self.assertEqual(self.transcriptions("s1"), ["pending words"])
+        self.assertNotIn("s1", self.service._sessions)
+        unique_session_id = self.service.getUniqueSessionId("s1")
+        control = self.service.redis_client.lists[f"{unique_session_id}:control"]
+        self.assertEqual(orjson.loads(control[-1])["action"], "stop")
+        self.assertIn("endTime", self.service.redis_client.hashes[unique_session_id])
+
+    async def test_start_command_accepts_null_config(self):
+        await self.service.process_command_start(
+            message(sessionId="s1", audioConfig=None, transcriptPreferences=None)
+        )
+
+        session = self.service.redis_client.hashes[self.service.getUniqueSessionId("s1")]
+        self.assertEqual(orjson.loads(session["audioConfig"]), {})
+        self.assertEqual(orjson.loads(session["transcriptPreferences"]), {})
+
+    async def test_shutdown_flushes_buffered_words(self):
+        await self.send("s1", "unfinished")
+        await self.send("s2", "another thought")
+        await self.settle()
+
+        await self.service.shutdown()
+
+        self.assertEqual(self.transcriptions("s1"), ["unfinished"])
+        self.assertEqual(self.transcriptions("s2"), ["another thought"])
+        self.assertEqual(self.service._sessions, {})
+        # Results go out before the connections they need are closed
+        self.assertLess(self.events.index("nats-publish"), self.events.index("nats-drained"))
+        self.assertLess(self.events.index("redis-write"), self.events.index("redis-closed"))
+
+
+if __name__ == "__main__":
+    unittest.main()